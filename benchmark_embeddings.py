@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import statistics
+import time
+
+from langchain_community.vectorstores import FAISS
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from evaluate import calculate_recall, get_ground_truth, normalize_url
+from loadgen import percentile
+from rag_data import load_shl_data
+
+# Builds a FAISS index per candidate embedding model and reports model and
+# index load time, encode throughput, query latency, index size and retrieval
+# recall@k on the train_set.csv labels. Latencies are for local CPU encoding;
+# each candidate's `serve_env` shows the main.py settings that serve it the
+# same way (EMBED_BACKEND=local). Only the plain PyTorch candidates can also
+# be served through the hosted HF endpoint (EMBED_BACKEND=hf_api), where the
+# query latency is the endpoint's, not the one measured here.
+#
+#   python benchmark_embeddings.py --models mpnet minilm minilm-onnx-int8
+#
+# ONNX variants need `pip install sentence-transformers[onnx]`.
+
+MPNET = "sentence-transformers/all-mpnet-base-v2"
+MINILM = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX = {"backend": "onnx"}
+ONNX_INT8 = {
+    "backend": "onnx",
+    "model_kwargs": {"file_name": "onnx/model_quint8_avx2.onnx"},
+}
+
+CANDIDATES = {
+    "mpnet": {"model_name": MPNET},
+    "mpnet-384": {"model_name": MPNET, "model_kwargs": {"truncate_dim": 384}},
+    "mpnet-onnx": {"model_name": MPNET, "model_kwargs": ONNX},
+    "mpnet-onnx-int8": {"model_name": MPNET, "model_kwargs": ONNX_INT8},
+    "minilm": {"model_name": MINILM},
+    "minilm-onnx": {"model_name": MINILM, "model_kwargs": ONNX},
+    "minilm-onnx-int8": {"model_name": MINILM, "model_kwargs": ONNX_INT8},
+}
+
+
+def dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+def serve_env(config, path, dim):
+    env = {
+        "EMBED_BACKEND": "local",
+        "EMBED_MODEL": config["model_name"],
+        "FAISS_INDEX_PATH": path,
+    }
+    if config.get("model_kwargs"):
+        env["EMBED_MODEL_KWARGS"] = f"'{json.dumps(config['model_kwargs'])}'"
+    if config.get("model_kwargs", {}).get("truncate_dim"):
+        env["EMBED_DIM"] = str(dim)
+    return " ".join(f"{key}={value}" for key, value in env.items())
+
+
+def benchmark(name, config, documents, ground_truth, k, repeats, warmup):
+    path = f"shl_faiss_index_{name}"
+    model_kwargs = config.get("model_kwargs", {})
+
+    start = time.perf_counter()
+    embeddings = HuggingFaceEmbeddings(
+        model_name=config["model_name"], model_kwargs=model_kwargs
+    )
+    model_load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector_db = FAISS.from_documents(documents, embeddings)
+    build_s = time.perf_counter() - start
+    vector_db.save_local(path)
+
+    # what main.py pays at startup
+    start = time.perf_counter()
+    vector_db = FAISS.load_local(
+        path, embeddings=None, allow_dangerous_deserialization=True
+    )
+    index_load_s = time.perf_counter() - start
+
+    queries = list(ground_truth)
+    for query in queries[:warmup]:
+        vector_db.similarity_search_by_vector(embeddings.embed_query(query), k=k)
+
+    latencies = []
+    recalls = []
+    for repeat in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            vec = embeddings.embed_query(query)
+            docs = vector_db.similarity_search_by_vector(vec, k=k)
+            latencies.append(time.perf_counter() - start)
+
+            if repeat == 0:
+                predicted = [normalize_url(d.metadata["url"]) for d in docs]
+                true_urls = {normalize_url(u) for u in ground_truth[query]}
+                recalls.append(calculate_recall(predicted, true_urls, k))
+
+    return {
+        "candidate": name,
+        "model": config["model_name"],
+        "dim": vector_db.index.d,
+        "model_load_s": round(model_load_s, 2),
+        "index_load_s": round(index_load_s, 3),
+        "encode_docs_per_s": round(len(documents) / build_s, 1),
+        "query_samples": len(latencies),
+        "query_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "query_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "index_mb": round(dir_size(path) / 1e6, 2),
+        f"recall@{k}": round(statistics.mean(recalls), 4),
+        "index_path": path,
+        "serve_env": serve_env(config, path, vector_db.index.d),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding models")
+    parser.add_argument(
+        "--models", nargs="+", default=list(CANDIDATES), choices=list(CANDIDATES)
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="timed passes over the queries"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=3, help="untimed queries before timing"
+    )
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    documents = load_shl_data()
+    ground_truth = get_ground_truth()
+
+    results = []
+    for name in args.models:
+        print(f"--- {name}")
+        try:
+            results.append(
+                benchmark(
+                    name,
+                    CANDIDATES[name],
+                    documents,
+                    ground_truth,
+                    args.k,
+                    args.repeats,
+                    args.warmup,
+                )
+            )
+        except Exception as e:
+            # e.g. ONNX backend not installed
+            print(f"skipping {name}: {e}")
+
+    # fmt: off
+    columns = [
+        "candidate", "dim", "model_load_s", "index_load_s", "encode_docs_per_s",
+        "query_p50_ms", "query_p99_ms", "index_mb", f"recall@{args.k}",
+    ]
+    # fmt: on
+    print("-" * 100)
+    print("".join(f"{c:>18}" for c in columns))
+    for r in results:
+        print("".join(f"{r[c]:>18}" for c in columns))
+    for r in results:
+        print(f"serve {r['candidate']}: {r['serve_env']} uvicorn main:app")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
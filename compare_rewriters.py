@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import statistics
+import time
+
+import pandas as pd
+from langchain_community.vectorstores import FAISS
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from evaluate import calculate_recall, get_ground_truth, normalize_url
+from query_rewriter import QueryRewriter
+
+# Side-by-side retrieval recall of the query rewriters on train_set.csv:
+#   raw   - the query as is
+#   local - query_rewriter.QueryRewriter
+#   llm   - main.process_query (Gemini, only with --llm since it costs quota)
+#
+#   python compare_rewriters.py --k 10 --llm --output rewriter_recall.csv
+#
+# Uses the same EMBED_MODEL / EMBED_MODEL_KWARGS / FAISS_INDEX_PATH / EMBED_DIM
+# settings as main.py, so the comparison runs against the index that is
+# actually served.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query rewriters")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--llm", action="store_true", help="include the Gemini rewriter"
+    )
+    parser.add_argument("--output", help="per-query results as CSV")
+    args = parser.parse_args()
+
+    embed_model = os.environ.get(
+        "EMBED_MODEL", "sentence-transformers/all-mpnet-base-v2"
+    )
+    index_path = os.environ.get("FAISS_INDEX_PATH", "shl_faiss_index")
+    embed_dim = int(os.environ["EMBED_DIM"]) if os.environ.get("EMBED_DIM") else None
+    model_kwargs = json.loads(os.environ.get("EMBED_MODEL_KWARGS", "{}"))
+    print(f"index: {index_path}, model: {embed_model}")
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=embed_model, model_kwargs=model_kwargs
+    )
+    vector_db = FAISS.load_local(
+        index_path, embeddings, allow_dangerous_deserialization=True
+    )
+
+    local_rewriter = QueryRewriter.from_catalog()
+    rewriters = {"raw": lambda q: q, "local": local_rewriter.rewrite}
+    if args.llm:
+        from main import process_query
+
+        rewriters["llm"] = process_query
+
+    ground_truth = get_ground_truth()
+    rows = []
+    for i, (query, true_urls) in enumerate(ground_truth.items()):
+        print(f"{i + 1}/{len(ground_truth)} {query[:60]!r}")
+        true_urls = {normalize_url(u) for u in true_urls}
+        row = {"query": query}
+        for name, rewrite in rewriters.items():
+            start = time.perf_counter()
+            rewritten = rewrite(query)
+            row[f"{name}_rewrite_ms"] = (time.perf_counter() - start) * 1000
+
+            vec = embeddings.embed_query(rewritten)
+            if embed_dim:
+                vec = vec[:embed_dim]
+            docs = vector_db.similarity_search_by_vector(vec, k=args.k)
+            predicted = [normalize_url(d.metadata["url"]) for d in docs]
+            row[f"{name}_recall"] = calculate_recall(predicted, true_urls, args.k)
+        rows.append(row)
+
+    print("-" * 60)
+    print(f"{'rewriter':<10}{'recall@' + str(args.k):>12}{'p50 ms':>12}{'max ms':>12}")
+    for name in rewriters:
+        recalls = [r[f"{name}_recall"] for r in rows]
+        times = [r[f"{name}_rewrite_ms"] for r in rows]
+        print(
+            f"{name:<10}{statistics.mean(recalls):>12.4f}"
+            f"{statistics.median(times):>12.3f}{max(times):>12.3f}"
+        )
+
+    if args.output:
+        pd.DataFrame(rows).to_csv(args.output, index=False)
+        print(f"per-query results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
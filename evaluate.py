@@ -27,6 +27,18 @@ def get_ground_truth():
     return ground_truth
 
 
+def load_queries(csv_path="train_set.csv"):
+    # distinct queries in file order; the CSVs repeat each query once per label row
+    df = pd.read_csv(csv_path)
+    query_col = df.columns[0]
+    return list(dict.fromkeys(str(q).strip() for q in df[query_col]))
+
+
+def normalize_url(url):
+    # index metadata uses shl.com/products/, labels use shl.com/solutions/products/
+    return url.strip().replace("shl.com/products/", "shl.com/solutions/products/")
+
+
 def calculate_recall(predicted_urls, true_urls, k=10):
     # Recall@k
 
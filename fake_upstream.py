@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the HF feature-extraction endpoint and the Gemini API,
+# used to exercise main.py's timeouts and fallbacks and to load test it
+# without spending API quota.
+#
+#   python fake_upstream.py --port 8001 --embed-latency 0.2 --llm-latency lognormal:2,0.5
+#   HF_API_URL=http://127.0.0.1:8001/feature-extraction \
+#   GEMINI_BASE_URL=http://127.0.0.1:8001 uvicorn main:app
+#
+# Latency specs: "0.2" (fixed seconds), "uniform:LOW,HIGH",
+# "lognormal:MEDIAN,SIGMA", "exp:MEAN".
+#
+# Real embeddings for the train/test queries can be precomputed once with
+#   python fake_upstream.py --precompute query_vectors.json
+# and served with --vectors query_vectors.json; other texts get hash vectors.
+# Both are sized for the index main.py serves: run it with the same
+# EMBED_MODEL / EMBED_MODEL_KWARGS / EMBED_DIM settings, or pass --dim.
+
+EMBED_MODEL = os.environ.get("EMBED_MODEL", "sentence-transformers/all-mpnet-base-v2")
+EMBED_MODEL_KWARGS = json.loads(os.environ.get("EMBED_MODEL_KWARGS", "{}"))
+# output size of the benchmark_embeddings.py candidate models
+MODEL_DIMS = {
+    "sentence-transformers/all-mpnet-base-v2": 768,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+}
+
+
+def vector_dim():
+    # main.py truncates query vectors to EMBED_DIM when it is set
+    if os.environ.get("EMBED_DIM"):
+        return int(os.environ["EMBED_DIM"])
+    if EMBED_MODEL_KWARGS.get("truncate_dim"):
+        return EMBED_MODEL_KWARGS["truncate_dim"]
+    return MODEL_DIMS.get(EMBED_MODEL)
+
+
+def parse_latency(spec: str):
+    # returns a function sampling one delay in seconds
+    kind, _, params = spec.partition(":")
+    if not params:
+        value = float(kind)
+        return lambda: value
+    values = [float(p) for p in params.split(",")]
+    if kind == "uniform":
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    if kind == "exp":
+        (mean,) = values
+        return lambda: random.expovariate(1.0 / mean)
+    raise ValueError(f"unknown latency distribution: {spec}")
+
+
+def fake_embedding(text: str, dim: int):
+    # same text -> same unit vector
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec]
+
+
+def _prompt_text(body):
+    parts = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                parts.append(part["text"])
+    return "\n".join(parts)
+
+
+def fake_recommendations(prompt_text: str, k: int = 10):
+    # echo back the first k assessments from the CONTEXT block of the rank prompt
+    blocks = re.findall(
+        r"URL: (.*)\nName: (.*)\nAdaptive_support: (.*)\ndescription: (.*)\n"
+        r"duration: (.*)\nremote_support: (.*)\ntest_type: (.*)\n",
+        prompt_text,
+    )
+    items = []
+    for url, name, adaptive, description, duration, remote, test_type in blocks[:k]:
+        items.append(
+            {
+                "url": url,
+                "name": name,
+                "adaptive_support": adaptive,
+                "description": description,
+                "duration": int(duration) if duration.isdigit() else None,
+                "remote_support": remote,
+                "test_type": re.findall(r"'([^']*)'", test_type),
+            }
+        )
+    return {"recommended_assessments": items}
+
+
+def gemini_response(body):
+    prompt_text = _prompt_text(body)
+    tools = body.get("tools") or []
+    declarations = [d for t in tools for d in t.get("functionDeclarations", [])]
+    config = body.get("generationConfig") or {}
+
+    if declarations:
+        part = {
+            "functionCall": {
+                "name": declarations[0]["name"],
+                "args": fake_recommendations(prompt_text),
+            }
+        }
+    elif config.get("responseMimeType") == "application/json":
+        part = {"text": json.dumps(fake_recommendations(prompt_text))}
+    else:
+        # query rewrite: echo the query so precomputed vectors still match
+        part = {"text": prompt_text}
+
+    return {
+        "candidates": [
+            {
+                "content": {"role": "model", "parts": [part]},
+                "finishReason": "STOP",
+                "index": 0,
+            }
+        ],
+        "usageMetadata": {
+            "promptTokenCount": 0,
+            "candidatesTokenCount": 0,
+            "totalTokenCount": 0,
+        },
+    }
+
+
+def precompute_vectors(path: str, dim: int):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from evaluate import load_queries
+
+    queries = load_queries("train_set.csv") + load_queries("test_set.csv")
+    queries = list(dict.fromkeys(queries))
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBED_MODEL, model_kwargs=EMBED_MODEL_KWARGS
+    )
+    vectors = [vec[:dim] for vec in embeddings.embed_documents(queries)]
+    with open(path, "w") as f:
+        json.dump(dict(zip(queries, vectors)), f)
+    print(f"saved {len(queries)} query vectors to {path}")
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    embed_latency = staticmethod(lambda: 0.0)
+    llm_latency = staticmethod(lambda: 0.0)
+    fail_rate = 0.0
+    dim = 768
+    vectors = {}
+
+    def _embedding(self, text: str):
+        if text in self.vectors:
+            return self.vectors[text]
+        return fake_embedding(text, self.dim)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith(":generateContent"):
+            time.sleep(self.llm_latency())
+            payload = gemini_response(body)
+        elif "feature-extraction" in self.path:
+            time.sleep(self.embed_latency())
+            payload = self._embedding(str(body.get("inputs", "")))
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+
+        if random.random() < self.fail_rate:
+            self._send_json(503, {"error": "injected failure"})
+            return
+        self._send_json(200, payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake HF/Gemini upstream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--embed-latency", default="0", help="latency spec")
+    parser.add_argument("--llm-latency", default="0", help="latency spec")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--dim", type=int, default=vector_dim(), help="embedding size to return"
+    )
+    parser.add_argument("--vectors", help="JSON of precomputed query vectors")
+    parser.add_argument(
+        "--precompute", metavar="PATH", help="embed train/test queries and exit"
+    )
+    args = parser.parse_args()
+    if args.dim is None:
+        parser.error(f"unknown embedding size for {EMBED_MODEL}, pass --dim")
+
+    if args.precompute:
+        precompute_vectors(args.precompute, args.dim)
+        return
+
+    FakeUpstreamHandler.embed_latency = staticmethod(parse_latency(args.embed_latency))
+    FakeUpstreamHandler.llm_latency = staticmethod(parse_latency(args.llm_latency))
+    FakeUpstreamHandler.fail_rate = args.fail_rate
+    FakeUpstreamHandler.dim = args.dim
+    if args.vectors:
+        with open(args.vectors) as f:
+            vectors = json.load(f)
+        sizes = {len(vec) for vec in vectors.values()}
+        if sizes - {args.dim}:
+            parser.error(f"{args.vectors} has {sizes} dim vectors, not {args.dim}")
+        FakeUpstreamHandler.vectors = vectors
+        print(f"loaded {len(vectors)} precomputed vectors")
+    print(f"serving {args.dim} dim embeddings for {EMBED_MODEL}")
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeUpstreamHandler)
+    print(f"fake upstream listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
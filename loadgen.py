@@ -0,0 +1,107 @@
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from evaluate import load_queries
+
+# Open-loop load generator for /recommend: requests are fired on a fixed
+# schedule at the target QPS whether or not earlier ones have finished, so
+# queueing inside the API shows up in the latency numbers.
+#
+#   python loadgen.py --qps 5 --duration 60 --concurrency 64
+
+
+def percentile(values, pct):
+    # nearest-rank percentile
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def send(api_url, query, timeout, scheduled_at):
+    # latency counts from the scheduled send time, so client-side queueing
+    # behind a saturated pool is not hidden (coordinated omission)
+    start = scheduled_at
+    try:
+        resp = requests.post(api_url, json={"query": query}, timeout=timeout)
+        latency = time.perf_counter() - start
+        if resp.status_code != 200:
+            return latency, f"http_{resp.status_code}", None
+        return latency, None, resp.json().get("degradation_level")
+    except requests.RequestException as e:
+        return time.perf_counter() - start, type(e).__name__, None
+
+
+def run(api_url, queries, qps, duration, concurrency, timeout):
+    results = []
+    lock = threading.Lock()
+    total = int(qps * duration)
+
+    def task(query, scheduled_at):
+        result = send(api_url, query, timeout, scheduled_at)
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            # fixed arrival schedule, independent of response times
+            scheduled_at = start + i / qps
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, queries[i % len(queries)], scheduled_at)
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, error, _ in results if error is None]
+    errors = Counter(error for _, error, _ in results if error is not None)
+    levels = Counter(level for _, error, level in results if error is None)
+    return {
+        "target_qps": qps,
+        "sent": total,
+        "completed": len(latencies),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+        "errors": dict(errors),
+        "degradation_levels": dict(levels),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /recommend endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/recommend")
+    parser.add_argument("--csv", default="train_set.csv")
+    parser.add_argument("--qps", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="write the summary as JSON")
+    args = parser.parse_args()
+
+    queries = load_queries(args.csv)
+    print(f"{len(queries)} queries, {args.qps} qps for {args.duration}s -> {args.url}")
+    summary = run(
+        args.url, queries, args.qps, args.duration, args.concurrency, args.timeout
+    )
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
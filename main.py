@@ -8,6 +8,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.rate_limiters import InMemoryRateLimiter
 
 # from langchain_core.runnables import RunnablePassthrough
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -15,6 +16,17 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 # from langchain_huggingface import HuggingFaceEmbeddings
 from pydantic import BaseModel, Field
 
+from pipeline import RANK_SHARE, REWRITE_SHARE, UpstreamUnavailable, run_pipeline
+from query_rewriter import QueryRewriter
+from resilience import (
+    CircuitBreaker,
+    Deadline,
+    StageTimeout,
+    bulkhead,
+    call_with_timeout,
+    hedged_call,
+)
+
 # from sentence_transformers import CrossEncoder
 
 load_dotenv()
@@ -29,22 +41,60 @@ app.add_middleware(
 
 # embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
 # reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2", max_length=512)
-HF_API_URL = "https://router.huggingface.co/hf-inference/models/sentence-transformers/all-mpnet-base-v2/pipeline/feature-extraction"
+# must match the model the FAISS index was built with (see benchmark_embeddings.py)
+EMBED_MODEL = os.environ.get("EMBED_MODEL", "sentence-transformers/all-mpnet-base-v2")
+FAISS_INDEX_PATH = os.environ.get("FAISS_INDEX_PATH", "shl_faiss_index")
+# set when the index was built with truncated embeddings
+EMBED_DIM = int(os.environ["EMBED_DIM"]) if os.environ.get("EMBED_DIM") else None
+# "hf_api" calls the hosted endpoint; "local" encodes in-process with
+# sentence-transformers, which is needed for the ONNX/int8 benchmark candidates
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "hf_api")
+# sentence-transformers kwargs for the local backend, as JSON, e.g.
+# {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_quint8_avx2.onnx"}}
+EMBED_MODEL_KWARGS = json.loads(os.environ.get("EMBED_MODEL_KWARGS", "{}"))
+HF_API_URL = os.environ.get(
+    "HF_API_URL",
+    f"https://router.huggingface.co/hf-inference/models/{EMBED_MODEL}/pipeline/feature-extraction",
+)
+# e.g. http://127.0.0.1:8001 to point Gemini calls at fake_upstream.py
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
 
 HF_TOKEN = os.environ.get("HF_TOKEN")
 
-if HF_TOKEN is None:
+if HF_TOKEN is None and EMBED_BACKEND == "hf_api":
     raise RuntimeError("HF_TOKEN environment variable not set")
 
 HF_HEADERS = {"Authorization": f"Bearer {HF_TOKEN}"}
 
+# latency budget (seconds) for one /recommend request, split as in pipeline.py
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", "25"))
+# start a second embedding request if the first is slower than this
+EMBED_HEDGE_DELAY = float(os.environ.get("EMBED_HEDGE_DELAY", "1.5"))
+
+# max Gemini requests per second across all threads, unlimited if unset
+LLM_RATE_LIMIT = float(os.environ.get("LLM_RATE_LIMIT", "0"))
+
+# "llm" rewrites queries with Gemini, "local" with the catalog keyword matcher
+QUERY_REWRITER = os.environ.get("QUERY_REWRITER", "llm")
+
+hf_breaker = CircuitBreaker("hf_embed")
+llm_breaker = CircuitBreaker("gemini")
+
+# FastAPI runs sync endpoints on anyio's threadpool (40 threads by default).
+# A request holds at most two HF threads (attempt + hedge) and two Gemini
+# threads (the ranking call plus a rewrite abandoned on timeout), so each
+# upstream gets its own pool of that size and a slow one cannot starve the other.
+API_THREADS = 40
+hf_pool = bulkhead("hf_embed", 2 * API_THREADS)
+llm_pool = bulkhead("gemini", 2 * API_THREADS)
+
 
-def embed_query(text: str) -> List[float]:
+def _post_embedding(text: str, timeout: float) -> List[float]:
     resp = requests.post(
         HF_API_URL,
         headers=HF_HEADERS,
         json={"inputs": text},
-        timeout=30,
+        timeout=timeout,
     )
     resp.raise_for_status()
     data = resp.json()
@@ -53,20 +103,60 @@ def embed_query(text: str) -> List[float]:
     return data
 
 
+def _retryable(error: Exception) -> bool:
+    # a second request can only help with transient upstream failures,
+    # not with e.g. a 401 from a bad HF_TOKEN
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+local_embeddings = None
+if EMBED_BACKEND == "local":
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    local_embeddings = HuggingFaceEmbeddings(
+        model_name=EMBED_MODEL, model_kwargs=EMBED_MODEL_KWARGS
+    )
+
+
+def embed_query(text: str, timeout: float = 30) -> List[float]:
+    if local_embeddings is not None:
+        # in-process CPU encode, no upstream to time out or trip a breaker
+        return local_embeddings.embed_query(text)
+    if timeout <= 0:
+        # out of budget, not an upstream failure
+        raise StageTimeout("no time left for embedding")
+    return hf_breaker.call(
+        hedged_call,
+        hf_pool,
+        lambda remaining: _post_embedding(text, remaining),
+        timeout=timeout,
+        hedge_delay=EMBED_HEDGE_DELAY,
+        retryable=_retryable,
+    )
+
+
 TOP_K = 20
+vector_db = None
 try:
     vector_db = FAISS.load_local(
-        "shl_faiss_index", embeddings=None, allow_dangerous_deserialization=True
+        FAISS_INDEX_PATH, embeddings=None, allow_dangerous_deserialization=True
     )
     # retriever = vector_db.as_retriever(search_kwargs={"k": top_k})
 except Exception as e:
     print(f"could not load vector_db. {e}")
 
 
-def get_candidates(query_text: str):
+def get_candidates(query_text: str, timeout: float = 30):
     if vector_db is None:
         return []
-    vec = embed_query(query_text)
+    vec = embed_query(query_text, timeout=timeout)
+    if EMBED_DIM:
+        vec = vec[:EMBED_DIM]
     # search by vector instead of by text
     return vector_db.similarity_search_by_vector(vec, k=TOP_K)
 
@@ -90,7 +180,24 @@ class RecommendationResponse(BaseModel):
 
 
 model = "gemini-2.5-flash"
-llm = ChatGoogleGenerativeAI(model=model)
+rate_limiter = (
+    InMemoryRateLimiter(requests_per_second=LLM_RATE_LIMIT) if LLM_RATE_LIMIT else None
+)
+
+
+def make_llm(timeout: float):
+    return ChatGoogleGenerativeAI(
+        model=model,
+        timeout=timeout,
+        base_url=GEMINI_BASE_URL,
+        rate_limiter=rate_limiter,
+    )
+
+
+# client timeouts match the stage budgets, so a call abandoned on timeout
+# releases its llm_pool thread by the end of its stage
+rewrite_llm = make_llm(REQUEST_DEADLINE * REWRITE_SHARE)
+llm = make_llm(REQUEST_DEADLINE * RANK_SHARE)
 structured_llm = llm.with_structured_output(RecommendationResponse)
 
 template = """
@@ -152,49 +259,99 @@ def process_query(query):
         ("human", query),
     ]
 
-    response = llm.invoke(messages)
+    response = rewrite_llm.invoke(messages)
     print(f"Processed Query: {response.text}")
     return response.text
 
 
-def retrieval_node(q: str):
-    candidates = get_candidates(q)
-    context = format_docs(candidates)
-    return {"context": context, "question": q}
+# only loaded when selected, so the default setup doesn't need the catalog file
+local_rewriter = None
+if QUERY_REWRITER == "local":
+    local_rewriter = QueryRewriter.from_catalog()
+
 
+def rewrite_query(query: str, timeout: float) -> str:
+    if QUERY_REWRITER == "local":
+        return local_rewriter.rewrite(query)
+    return llm_breaker.call(call_with_timeout, llm_pool, process_query, timeout, query)
+
+
+rank_chain = prompt | structured_llm
+
+
+def retrieval_ranked(docs, k=10):
+    # fallback when the LLM stage is skipped: keep the vector search order
+    return {
+        "recommended_assessments": [
+            {
+                "url": d.metadata["url"],
+                "name": d.metadata["name"],
+                "adaptive_support": d.metadata["adaptive_support"],
+                "description": d.metadata["description"],
+                "duration": d.metadata["duration"],
+                "remote_support": d.metadata["remote_support"],
+                "test_type": d.metadata["test_type"],
+            }
+            for d in docs[:k]
+        ]
+    }
+
+
+def rank_candidates(candidates, query: str, timeout: float) -> dict:
+    response = llm_breaker.call(
+        call_with_timeout,
+        llm_pool,
+        rank_chain.invoke,
+        timeout,
+        {"context": format_docs(candidates), "question": query},
+    )
+    return response.dict()
+
+
+def recommend(query: str, deadline: Optional[Deadline] = None) -> dict:
+    if deadline is None:
+        deadline = Deadline(REQUEST_DEADLINE)
+    result = run_pipeline(
+        query,
+        deadline,
+        rewrite=rewrite_query,
+        retrieve=get_candidates,
+        rank=rank_candidates,
+        fallback=retrieval_ranked,
+        # the local rewriter takes microseconds, it runs regardless of budget
+        rewrite_needs_time=QUERY_REWRITER != "local",
+        retrieval_errors=(requests.RequestException,),
+    )
 
-rag_chain = retrieval_node | prompt | structured_llm
+    for item in result["recommended_assessments"]:
+        original_url = item["url"]
+        if "shl.com/products/" in original_url:
+            # normalizing Urls
+            item["url"] = original_url.replace(
+                "shl.com/products/", "shl.com/solutions/products/"
+            )
+    return result
 
 
 class QueryRequest(BaseModel):
     query: str
 
 
+# plain def: the pipeline blocks on upstream calls, so run it in FastAPI's threadpool
 @app.post("/recommend")
-async def recommend_assesments(request: QueryRequest):
+def recommend_assesments(request: QueryRequest):
     try:
-        query = request.query
-        processed_query = process_query(query)
-        # response = rag_chain.invoke(
-        #     {"retrieval_query": processed_query, "llm_query": query}
-        # )
-        response = rag_chain.invoke(processed_query)
-        result = response.dict()
-
-        for item in result["recommended_assessments"]:
-            original_url = item["url"]
-            if "shl.com/products/" in original_url:
-                # normalizing Urls
-                item["url"] = original_url.replace(
-                    "shl.com/products/", "shl.com/solutions/products/"
-                )
-
-        return result
+        return recommend(request.query)
 
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/health")
 def health_check():
-    return {"status": "active"}
+    return {
+        "status": "active",
+        "circuits": {b.name: b.snapshot() for b in (hf_breaker, llm_breaker)},
+    }
@@ -0,0 +1,79 @@
+from resilience import CircuitOpenError, StageTimeout
+
+# The /recommend stages under one request Deadline: query rewrite, retrieval
+# and LLM ranking, each skipped or replaced by a fallback when it fails or
+# would eat into the time the later stages need. main.py passes in the real
+# upstream calls.
+
+# how the request deadline is split across the stages
+REWRITE_SHARE = 0.3
+EMBED_SHARE = 0.2
+RANK_SHARE = 0.5
+# minimum time that must be left for a stage to be attempted at all
+MIN_EMBED_TIME = 1.0
+MIN_RANK_TIME = 4.0
+
+# degradation levels reported in responses
+DEGRADATION_NONE = "none"
+DEGRADATION_RAW_QUERY = "raw_query"
+DEGRADATION_RETRIEVAL_ONLY = "retrieval_only"
+
+
+class UpstreamUnavailable(RuntimeError):
+    pass
+
+
+def run_pipeline(
+    query,
+    deadline,
+    rewrite,
+    retrieve,
+    rank,
+    fallback,
+    rewrite_needs_time=True,
+    retrieval_errors=(),
+):
+    # rewrite(query, timeout) -> search query
+    # retrieve(search_query, timeout) -> candidates
+    # rank(candidates, search_query, timeout) -> result dict
+    # fallback(candidates) -> result dict in retrieval order
+    level = DEGRADATION_NONE
+
+    # stage 1: keyword rewrite, skipped when it would eat into later stages
+    search_query = query
+    rewrite_budget = deadline.budget(
+        REWRITE_SHARE, reserve=MIN_EMBED_TIME + MIN_RANK_TIME
+    )
+    if not rewrite_needs_time or rewrite_budget > 0:
+        try:
+            search_query = rewrite(query, rewrite_budget)
+        except Exception as e:
+            print(f"Skipping query rewrite: {e}")
+            level = DEGRADATION_RAW_QUERY
+    else:
+        level = DEGRADATION_RAW_QUERY
+
+    # stage 2: retrieval, there is nothing to fall back to if this fails
+    embed_budget = max(
+        deadline.budget(EMBED_SHARE, reserve=MIN_RANK_TIME),
+        min(MIN_EMBED_TIME, deadline.remaining()),
+    )
+    try:
+        candidates = retrieve(search_query, embed_budget)
+    except (StageTimeout, CircuitOpenError, *retrieval_errors) as e:
+        raise UpstreamUnavailable(f"embedding service unavailable: {e}") from e
+
+    # stage 3: LLM ranking, falls back to the retrieval order
+    result = None
+    rank_budget = deadline.budget(RANK_SHARE)
+    if rank_budget >= MIN_RANK_TIME:
+        try:
+            result = rank(candidates, search_query, rank_budget)
+        except Exception as e:
+            print(f"Skipping LLM ranking: {e}")
+    if result is None:
+        level = DEGRADATION_RETRIEVAL_ONLY
+        result = fallback(candidates)
+
+    result["degradation_level"] = level
+    return result
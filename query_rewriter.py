@@ -0,0 +1,316 @@
+import json
+import re
+import time
+from collections import deque
+
+# Local alternative to the Gemini call in main.process_query: pulls role,
+# seniority, skill, duration and domain keywords out of the query with a
+# single Aho-Corasick pass over a vocabulary mined from the product catalog,
+# plus a few regexes for durations and years of experience.
+
+CATALOG_PATH = "./web_scraping/shl_products_final.json"
+
+# fmt: off
+# name words that say nothing about the skill being tested
+GENERIC_WORDS = {
+    "ability", "access", "accounts", "action", "advanced", "analysis", "and",
+    "anywhere", "applications", "assessment", "aus", "basic", "basis", "beans", "bw",
+    "calculation", "call", "candidate", "cards", "cc", "center", "centers", "checking",
+    "comparison", "concepts", "contact", "contributor", "control", "core", "count",
+    "demand", "design", "desk", "dev", "development", "diseases", "drives", "dynamics",
+    "edition", "employee", "end", "engine", "enterprise", "entry", "essential",
+    "essentials", "exercises", "experience", "extensions", "feedback", "filing", "fire",
+    "fix", "focus", "following", "food", "for", "form", "forms", "framework", "front",
+    "functional", "fundamental", "fundamentals", "general", "generation", "global",
+    "group", "guide", "health", "hiring", "human", "ic", "impact", "implementation",
+    "in", "individual", "indust", "information", "instructions", "instrument",
+    "integration", "intelligence", "interactive", "intermediate", "interpretation",
+    "interview", "interviewing", "is", "job", "key", "lab", "language", "learning",
+    "level", "live", "load", "manufac", "materials", "maximising", "micro", "money",
+    "monitoring", "ms", "multi", "names", "narrative", "new", "next", "numbers",
+    "objects", "of", "on", "operating", "order", "out", "pack", "participant",
+    "patterns", "performance", "phone", "pl", "planner", "platform", "plus",
+    "potential", "power", "premium", "prism", "pro", "process", "profile", "profiler",
+    "profiling", "questionnaire", "rater", "readiness", "reading", "report",
+    "reporting", "reports", "resources", "reviewing", "risk", "runner", "scenarios",
+    "screen", "sd", "search", "selection", "serv", "server", "service", "services",
+    "shell", "shl", "sim", "simulation", "skills", "smart", "social", "solution",
+    "split", "standard", "styles", "support", "system", "systems", "team", "techniques",
+    "technology", "ten", "test", "the", "time", "tips", "to", "transformation", "types",
+    "uk", "unified", "universal", "unlocking", "us", "user", "users", "value",
+    "virtual", "visual", "web", "what", "with", "word", "working", "workplace",
+    "written", "your",
+}
+
+# seniority words -> catalog job level
+SENIORITY_TERMS = {
+    "intern": "Entry-Level",
+    "interns": "Entry-Level",
+    "fresher": "Entry-Level",
+    "freshers": "Entry-Level",
+    "junior": "Entry-Level",
+    "entry level": "Entry-Level",
+    "entry-level": "Entry-Level",
+    "new graduates": "Graduate",
+    "graduate": "Graduate",
+    "graduates": "Graduate",
+    "mid-level": "Mid-Professional",
+    "mid level": "Mid-Professional",
+    "experienced": "Mid-Professional",
+    "senior": "Mid-Professional",
+    "individual contributor": "Professional Individual Contributor",
+    "team lead": "Front Line Manager",
+    "team leads": "Front Line Manager",
+    "supervisor": "Supervisor",
+    "supervisors": "Supervisor",
+    "manager": "Manager",
+    "managers": "Manager",
+    "head of": "Director",
+    "director": "Director",
+    "directors": "Director",
+    "vp": "Executive",
+    "vice president": "Executive",
+    "executive": "Executive",
+    "executives": "Executive",
+    "coo": "Executive",
+    "ceo": "Executive",
+    "cxo": "Executive",
+}
+
+ROLE_TERMS = {
+    "developer", "engineer", "programmer", "analyst", "consultant", "administrator",
+    "tester", "qa", "designer", "architect", "scientist", "accountant", "cashier",
+    "clerk", "assistant", "nurse", "agent", "representative", "salesperson",
+    "technician", "operator", "specialist", "coordinator", "recruiter", "writer",
+    "editor", "trainer", "teacher", "banker", "researcher",
+}
+
+# aliases for catalog test types
+TEST_TYPE_TERMS = {
+    "personality": "Personality & Behaviour",
+    "behaviour": "Personality & Behaviour",
+    "behavior": "Personality & Behaviour",
+    "behavioural": "Personality & Behaviour",
+    "behavioral": "Personality & Behaviour",
+    "cognitive": "Ability & Aptitude",
+    "aptitude": "Ability & Aptitude",
+    "reasoning": "Ability & Aptitude",
+    "numerical": "Ability & Aptitude",
+    "verbal": "Ability & Aptitude",
+    "situational judgement": "Biodata & Situational Judgement",
+    "situational judgment": "Biodata & Situational Judgement",
+    "competency": "Competencies",
+    "competencies": "Competencies",
+    "360": "Development & 360",
+    "simulation": "Simulations",
+    "simulations": "Simulations",
+    "technical skills": "Knowledge & Skills",
+}
+
+DOMAIN_TERMS = {
+    "finance", "financial", "banking", "accounting", "healthcare", "medical",
+    "pharmaceutical", "retail", "sales", "marketing", "customer service",
+    "customer support", "contact center", "call center", "hospitality", "hotel",
+    "manufacturing", "insurance", "telecom", "logistics", "hr", "human resources",
+    "recruitment", "legal", "education", "consulting", "e-commerce", "media",
+    "content", "seo", "data", "analytics", "cloud", "security", "product",
+}
+# fmt: on
+
+DURATION_RANGE_RE = re.compile(r"(\d+)\s*(?:-|to)\s*(\d+)\s*(?:min|mins|minutes)\b")
+DURATION_MIN_RE = re.compile(r"(\d+)\s*(?:min|mins|minute|minutes)\b")
+DURATION_HOUR_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:hr|hrs|hour|hours)\b")
+HALF_HOUR_RE = re.compile(r"\bhalf an hour\b")
+ONE_HOUR_RE = re.compile(r"\b(?:an|one) hour\b")
+# "N years" only counts next to "experience"/"exp": "5+ years of work
+# experience", "experience required 0-2 years", not "a role that lasts 2 years"
+_YEARS = r"(\d+)\s*(?:(?:-|to)\s*\d+\s*)?\+?\s*(?:years?|yrs?)\b"
+_EXP = r"\bexp(?:erience)?\b"
+EXPERIENCE_RE = re.compile(
+    _YEARS + r"(?=[^.\n]{0,30}?" + _EXP + ")" + r"|" + _EXP + r"[^.\n]{0,30}?" + _YEARS
+)
+
+
+def _plural(word):
+    # role nouns only, "developers", "salespeople"
+    if word.endswith("person"):
+        return word[: -len("person")] + "people"
+    if word.endswith(("s", "x", "ch", "sh")):
+        return word + "es"
+    return word + "s"
+
+
+def _clean_name(name):
+    # "Core Java (Advanced Level) (New)" -> "core java"
+    name = re.sub(r"\([^)]*\)", " ", name.lower())
+    return re.sub(r"\s+", " ", name).strip(" -–")
+
+
+class AhoCorasick:
+    # multi-pattern matcher: one pass over the text finds every vocabulary term
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(pattern)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text):
+        # yields (end_index, pattern) for every occurrence
+        state = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern in out[state]:
+                yield i, pattern
+
+
+class QueryRewriter:
+    def __init__(self, vocabulary):
+        # vocabulary: term -> list of keywords emitted when the term is found
+        self.vocabulary = vocabulary
+        self.matcher = AhoCorasick(vocabulary)
+
+    @classmethod
+    def from_catalog(cls, path=CATALOG_PATH):
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        vocabulary = {}
+
+        def add(term, keyword):
+            term = term.strip().lower()
+            # single letters ("r", "c") match too much prose
+            if len(term) < 2 and not re.search(r"[+#]", term):
+                return
+            keywords = vocabulary.setdefault(term, [])
+            if keyword not in keywords:
+                keywords.append(keyword)
+
+        for item in data:
+            name = _clean_name(item["name"])
+            add(name, name)
+            # "automata - sql", "html/css" -> segments
+            for segment in re.split(r"\s+[-–]\s+|/|&| and | with ", name):
+                segment = segment.strip()
+                if segment and segment not in GENERIC_WORDS:
+                    add(segment, segment)
+            for word in re.findall(r"\.?[a-z0-9][a-z0-9+#.]*", name):
+                word = word.rstrip(".")
+                if word not in GENERIC_WORDS and not re.fullmatch(r"v?[\d.]+", word):
+                    add(word, word)
+            for test_type in item["test_type"]:
+                add(test_type, test_type)
+            for level in (item["job_levels"] or "").split(","):
+                if level.strip():
+                    add(level, level.strip())
+            for language in (item["languages"] or "").split(","):
+                if language.strip():
+                    add(language, language.strip())
+
+        for term, level in SENIORITY_TERMS.items():
+            add(term, term)
+            add(term, level)
+        for term in ROLE_TERMS:
+            add(term, term)
+            # queries mostly ask for roles in the plural
+            add(_plural(term), term)
+        for term, test_type in TEST_TYPE_TERMS.items():
+            add(term, test_type)
+        for term in DOMAIN_TERMS:
+            add(term, term)
+
+        return cls(vocabulary)
+
+    def keywords(self, query):
+        text = query.lower()
+        found = {}
+        for end, term in self.matcher.iter(text):
+            start = end - len(term) + 1
+            # whole words only, where the term edge is a word character
+            if term[0].isalnum() and start > 0 and text[start - 1].isalnum():
+                continue
+            if term[-1].isalnum() and end + 1 < len(text) and text[end + 1].isalnum():
+                continue
+            for keyword in self.vocabulary[term]:
+                found.setdefault(keyword, start)
+
+        keywords = sorted(found, key=found.get)
+        keywords.extend(self._durations(text))
+        keywords.extend(self._experience(text))
+        # "manager" and "Manager" (the job level) are the same keyword
+        unique = {}
+        for keyword in keywords:
+            unique.setdefault(keyword.lower(), keyword)
+        return list(unique.values())
+
+    def _durations(self, text):
+        minutes = [int(high) for _, high in DURATION_RANGE_RE.findall(text)]
+        minutes += [int(m) for m in DURATION_MIN_RE.findall(text)]
+        minutes += [int(float(h) * 60) for h in DURATION_HOUR_RE.findall(text)]
+        if HALF_HOUR_RE.search(text):
+            minutes.append(30)
+        elif ONE_HOUR_RE.search(text):
+            minutes.append(60)
+        if not minutes:
+            return []
+        return [f"{max(minutes)} minutes"]
+
+    def _experience(self, text):
+        # lower bound of "0-2 years", "5+ years"
+        years = [int(a or b) for a, b in EXPERIENCE_RE.findall(text)]
+        if not years:
+            return []
+        years = max(years)
+        if years < 2:
+            return ["Entry-Level"]
+        if years < 5:
+            return ["Mid-Professional"]
+        return ["senior", "Mid-Professional"]
+
+    def rewrite(self, query, max_query_chars=500):
+        # same shape as the LLM rewrite: keywords, then a short description
+        keywords = self.keywords(query)
+        description = " ".join(query.split())[:max_query_chars]
+        if not keywords:
+            return description
+        return f"{', '.join(keywords)}\n{description}"
+
+
+if __name__ == "__main__":
+    rewriter = QueryRewriter.from_catalog()
+    print(f"vocabulary: {len(rewriter.vocabulary)} terms")
+    query = "I want to hire new graduates for a sales role in my company, the budget is for about an hour for each test."
+    start = time.perf_counter()
+    rewritten = rewriter.rewrite(query)
+    print(f"rewrite took {(time.perf_counter() - start) * 1e6:.0f} us")
+    print(rewritten)
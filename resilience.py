@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def bulkhead(name: str, max_workers: int) -> ThreadPoolExecutor:
+    # one pool per upstream, so abandoned calls to a slow upstream can only
+    # exhaust that upstream's threads
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+class StageTimeout(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class Deadline:
+    # per-request time budget, split across the pipeline stages
+
+    def __init__(self, seconds: float):
+        self.total = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, share: float, reserve: float = 0.0) -> float:
+        # share of the total budget, capped so `reserve` seconds stay for later stages
+        return max(0.0, min(self.total * share, self.remaining() - reserve))
+
+
+class CircuitBreaker:
+    # closed -> open after `failure_threshold` consecutive failures,
+    # open -> half_open after `reset_timeout`, one trial call decides the next state
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if (
+                self.state == "open"
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                # let a single trial request through
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(f"circuit '{self.name}' is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+
+def call_with_timeout(executor, fn, timeout: float, *args, **kwargs):
+    # the worker thread is abandoned on timeout; the client's own timeout bounds it
+    if timeout <= 0:
+        raise StageTimeout("no time left in budget")
+    future = executor.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError as e:
+        future.cancel()
+        raise StageTimeout(f"timed out after {timeout:.2f}s") from e
+
+
+def hedged_call(
+    executor,
+    fn,
+    timeout: float,
+    hedge_delay: float,
+    max_attempts: int = 2,
+    retryable=lambda e: True,
+):
+    # fn(remaining_seconds) is started again if the first attempt is slower than
+    # `hedge_delay` or fails with an error `retryable(error)` accepts; the first
+    # successful attempt wins and any other error is raised straight away
+    end = time.monotonic() + timeout
+    if timeout <= 0:
+        raise StageTimeout("no time left in budget")
+
+    pending = {executor.submit(fn, timeout)}
+    attempts = 1
+    last_error = None
+    while pending:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            break
+        can_hedge = attempts < max_attempts
+        wait_for = min(remaining, hedge_delay) if can_hedge else remaining
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for f in done:
+            error = f.exception()
+            if error is None or not retryable(error):
+                # another attempt can't change the answer
+                for p in pending:
+                    p.cancel()
+                return f.result()
+            last_error = error
+
+        remaining = end - time.monotonic()
+        if can_hedge and remaining > 0:
+            pending.add(executor.submit(fn, remaining))
+            attempts += 1
+
+    if last_error is not None and not pending:
+        raise last_error
+    # don't let queued or in-flight hedges fire after the caller has given up
+    for p in pending:
+        p.cancel()
+    raise StageTimeout(f"no response within {timeout:.2f}s after {attempts} attempt(s)")
@@ -0,0 +1,190 @@
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Bulk offline scoring: runs the recommendation pipeline in-process over every
+# distinct query in a CSV and streams the results to CSV (Query,Assessment_url
+# rows, the submission format) or JSONL (full responses). Queries already in
+# the output file are skipped, so an interrupted run picks up where it stopped.
+# Degraded results (rewrite skipped or vector-search order without the LLM)
+# are treated as failures and retried on the next run unless --accept-degraded
+# is given, which is only allowed for JSONL output since it records each
+# result's degradation_level.
+#
+#   python score_queries.py --input test_set.csv --output submission.csv \
+#       --workers 4 --llm-rps 1
+
+
+def _complete_records(text):
+    # end of the last complete CSV record: a line terminator outside quotes,
+    # i.e. with an even number of quote characters before it
+    end = len(text)
+    while end > 0:
+        if text.endswith("\r\n", 0, end) and text.count('"', 0, end) % 2 == 0:
+            break
+        end = text.rfind("\r\n", 0, end - 1)
+        end = end + 2 if end >= 0 else 0
+    return text[:end]
+
+
+def repair_output(output_path):
+    # drop whatever an interrupted run may have left half-written at the end
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return
+    if output_path.endswith(".jsonl"):
+        with open(output_path, "rb+") as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        return
+
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        text = f.read()
+    # a write cut inside a row leaves a shortened query in it, so cut back to
+    # the last complete row before looking at the query it belongs to
+    rows = list(csv.reader(io.StringIO(_complete_records(text), newline="")))
+    # a query spans several rows, so the last group can't be trusted to be
+    # complete either; drop it and score that query again
+    if len(rows) > 1:
+        last_query = rows[-1][0]
+        while len(rows) > 1 and rows[-1][0] == last_query:
+            rows.pop()
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    os.replace(tmp_path, output_path)
+
+
+def completed_queries(output_path):
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return set()
+    if output_path.endswith(".jsonl"):
+        with open(output_path, "r", encoding="utf-8") as f:
+            return {json.loads(line)["query"] for line in f if line.strip()}
+    with open(output_path, "r", encoding="utf-8", newline="") as f:
+        return {row[0] for row in list(csv.reader(f))[1:]}
+
+
+class ResultWriter:
+    # appends each query's results in a single write and flushes, so a crash
+    # loses at most the query being written
+
+    def __init__(self, output_path):
+        self.jsonl = output_path.endswith(".jsonl")
+        is_new = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+        self.file = open(output_path, "a", encoding="utf-8", newline="")
+        self.lock = threading.Lock()
+        if is_new and not self.jsonl:
+            self.file.write(self._csv_chunk([["Query", "Assessment_url"]]))
+
+    def _csv_chunk(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def write(self, query, result):
+        if self.jsonl:
+            chunk = json.dumps({"query": query, **result}) + "\n"
+        else:
+            urls = [r["url"] for r in result["recommended_assessments"]]
+            # an empty url still marks the query as done
+            chunk = self._csv_chunk([query, url] for url in urls or [""])
+        with self.lock:
+            self.file.write(chunk)
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV of queries in bulk")
+    parser.add_argument("--input", default="test_set.csv")
+    parser.add_argument("--output", default="submission.csv", help=".csv or .jsonl")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--llm-rps", type=float, default=1.0, help="max Gemini requests per second"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=300.0, help="seconds per query"
+    )
+    parser.add_argument(
+        "--accept-degraded",
+        action="store_true",
+        help="also write results with a degradation_level other than 'none'",
+    )
+    args = parser.parse_args()
+    if args.accept_degraded and not args.output.endswith(".jsonl"):
+        # the CSV submission format has nowhere to record the level
+        parser.error("--accept-degraded needs a .jsonl output")
+
+    # main reads these at import time
+    os.environ["LLM_RATE_LIMIT"] = str(args.llm_rps)
+    os.environ["REQUEST_DEADLINE"] = str(args.deadline)
+    from evaluate import load_queries
+    from main import recommend
+
+    queries = load_queries(args.input)
+    repair_output(args.output)
+    done = completed_queries(args.output)
+    pending = [q for q in queries if q not in done]
+    print(
+        f"{len(queries)} distinct queries, {len(done)} already scored, "
+        f"{len(pending)} to go"
+    )
+
+    writer = ResultWriter(args.output)
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    failed = 0
+    degraded = 0
+    start = time.perf_counter()
+    try:
+        futures = {pool.submit(recommend, q): q for q in pending}
+        for i, future in enumerate(as_completed(futures)):
+            query = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # not written, so the next run retries it
+                failed += 1
+                print(f"{i + 1}/{len(pending)} FAILED {query[:60]!r}: {e}")
+                continue
+            level = result["degradation_level"]
+            if level != "none":
+                degraded += 1
+                if not args.accept_degraded:
+                    failed += 1
+                    print(f"{i + 1}/{len(pending)} DEGRADED ({level}) {query[:60]!r}")
+                    continue
+            writer.write(query, result)
+            print(
+                f"{i + 1}/{len(pending)} {query[:60]!r} -> "
+                f"{len(result['recommended_assessments'])} results "
+                f"({result['degradation_level']})"
+            )
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+        print("interrupted, re-run the same command to resume", flush=True)
+        # exit without joining the workers: their in-flight queries would only
+        # finish (up to --deadline) to be thrown away
+        os._exit(130)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"scored {len(pending) - failed} queries in {elapsed:.1f}s, {failed} failed")
+    if failed:
+        print("re-run the same command to retry the failed queries")
+    if degraded and args.accept_degraded:
+        print(f"{degraded} degraded results were written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import pytest
+
+from pipeline import (
+    DEGRADATION_NONE,
+    DEGRADATION_RAW_QUERY,
+    DEGRADATION_RETRIEVAL_ONLY,
+    MIN_EMBED_TIME,
+    MIN_RANK_TIME,
+    UpstreamUnavailable,
+    run_pipeline,
+)
+from resilience import CircuitOpenError, Deadline, StageTimeout
+
+
+class FakeDoc:
+    def __init__(self, n):
+        self.metadata = {
+            "url": f"https://www.shl.com/products/product-catalog/view/a{n}/",
+            "name": f"A{n}",
+            "adaptive_support": "No",
+            "description": "d",
+            "duration": 30,
+            "remote_support": "Yes",
+            "test_type": ["Knowledge & Skills"],
+        }
+
+
+def fallback(docs, k=10):
+    return {"recommended_assessments": [d.metadata for d in docs[:k]]}
+
+
+class Stages:
+    # records what each stage was called with; set a stage to an exception to fail it
+    def __init__(self):
+        self.rewrite_error = None
+        self.retrieve_error = None
+        self.rank_error = None
+        self.calls = []
+
+    def rewrite(self, query, timeout):
+        self.calls.append(("rewrite", query, timeout))
+        if self.rewrite_error:
+            raise self.rewrite_error
+        return f"keywords: {query}"
+
+    def retrieve(self, query, timeout):
+        self.calls.append(("retrieve", query, timeout))
+        if self.retrieve_error:
+            raise self.retrieve_error
+        return [FakeDoc(n) for n in range(12)]
+
+    def rank(self, candidates, query, timeout):
+        self.calls.append(("rank", query, timeout))
+        if self.rank_error:
+            raise self.rank_error
+        return {"recommended_assessments": [candidates[3].metadata]}
+
+    def run(self, query="java developer", seconds=25, **kwargs):
+        return run_pipeline(
+            query,
+            Deadline(seconds),
+            rewrite=self.rewrite,
+            retrieve=self.retrieve,
+            rank=self.rank,
+            fallback=fallback,
+            **kwargs,
+        )
+
+    def stages(self):
+        return [call[0] for call in self.calls]
+
+
+@pytest.fixture
+def stages():
+    return Stages()
+
+
+def test_full_pipeline(stages):
+    result = stages.run()
+    assert result["degradation_level"] == DEGRADATION_NONE
+    assert stages.stages() == ["rewrite", "retrieve", "rank"]
+    # later stages search with the rewritten query
+    assert stages.calls[1][1] == "keywords: java developer"
+    assert stages.calls[2][1] == "keywords: java developer"
+    assert [r["name"] for r in result["recommended_assessments"]] == ["A3"]
+
+
+def test_stage_budgets_follow_shares(stages):
+    stages.run(seconds=20)
+    _, _, rewrite_budget = stages.calls[0]
+    _, _, embed_budget = stages.calls[1]
+    _, _, rank_budget = stages.calls[2]
+    assert rewrite_budget == pytest.approx(6.0, abs=0.05)
+    assert embed_budget == pytest.approx(4.0, abs=0.05)
+    assert rank_budget == pytest.approx(10.0, abs=0.05)
+
+
+def test_failed_rewrite_searches_raw_query(stages):
+    stages.rewrite_error = StageTimeout("slow")
+    result = stages.run()
+    assert result["degradation_level"] == DEGRADATION_RAW_QUERY
+    assert stages.calls[1][1] == "java developer"
+
+
+def test_rewrite_skipped_without_time_for_later_stages(stages):
+    stages.run(seconds=MIN_EMBED_TIME + MIN_RANK_TIME)
+    assert stages.stages()[0] == "retrieve"
+    assert stages.calls[0][1] == "java developer"
+
+
+def test_rewrite_that_needs_no_time_always_runs(stages):
+    stages.run(seconds=MIN_EMBED_TIME + MIN_RANK_TIME, rewrite_needs_time=False)
+    assert stages.stages()[:2] == ["rewrite", "retrieve"]
+    assert stages.calls[1][1] == "keywords: java developer"
+
+
+def test_failed_ranking_falls_back_to_retrieval_order(stages):
+    stages.rank_error = RuntimeError("429")
+    result = stages.run()
+    assert result["degradation_level"] == DEGRADATION_RETRIEVAL_ONLY
+    names = [r["name"] for r in result["recommended_assessments"]]
+    assert names == [f"A{n}" for n in range(10)]
+
+
+def test_ranking_skipped_without_time(stages):
+    result = stages.run(seconds=MIN_RANK_TIME)
+    assert result["degradation_level"] == DEGRADATION_RETRIEVAL_ONLY
+    assert "rank" not in stages.stages()
+
+
+def test_failed_rewrite_and_ranking_report_retrieval_only(stages):
+    stages.rewrite_error = StageTimeout("slow")
+    stages.rank_error = CircuitOpenError("open")
+    result = stages.run()
+    assert result["degradation_level"] == DEGRADATION_RETRIEVAL_ONLY
+
+
+@pytest.mark.parametrize(
+    "error", [StageTimeout("hf down"), CircuitOpenError("open"), ConnectionError()]
+)
+def test_retrieval_outage_raises_upstream_unavailable(stages, error):
+    stages.retrieve_error = error
+    with pytest.raises(UpstreamUnavailable):
+        stages.run(retrieval_errors=(ConnectionError,))
+    assert "rank" not in stages.stages()
+
+
+def test_other_retrieval_errors_propagate(stages):
+    stages.retrieve_error = ValueError("dimension mismatch")
+    with pytest.raises(ValueError):
+        stages.run()
+
+
+@pytest.fixture
+def main(monkeypatch):
+    monkeypatch.setenv("HF_TOKEN", "test")
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    module = pytest.importorskip("main")
+
+    stages = Stages()
+    monkeypatch.setattr(module, "rewrite_query", stages.rewrite)
+    monkeypatch.setattr(module, "get_candidates", stages.retrieve)
+    monkeypatch.setattr(module, "rank_candidates", stages.rank)
+    module.stages = stages
+    return module
+
+
+def test_recommend_normalizes_urls(main):
+    result = main.recommend("java developer")
+    assert result["degradation_level"] == DEGRADATION_NONE
+    assert main.stages.stages() == ["rewrite", "retrieve", "rank"]
+    assert result["recommended_assessments"][0]["url"].startswith(
+        "https://www.shl.com/solutions/products/"
+    )
+
+
+def test_recommend_maps_request_errors_to_upstream_unavailable(main):
+    main.stages.retrieve_error = main.requests.ConnectionError("reset")
+    with pytest.raises(UpstreamUnavailable):
+        main.recommend("java developer")
@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pytest
+
+import resilience
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    StageTimeout,
+    bulkhead,
+    call_with_timeout,
+    hedged_call,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def pool():
+    executor = bulkhead("test", 4)
+    yield executor
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def boom():
+    raise ValueError("boom")
+
+
+def test_deadline_budget(clock):
+    deadline = Deadline(10)
+    assert deadline.budget(0.3) == pytest.approx(3.0)
+    assert deadline.budget(0.3, reserve=8) == pytest.approx(2.0)
+    assert deadline.budget(0.3, reserve=20) == 0.0
+
+    clock.now += 9
+    assert deadline.remaining() == pytest.approx(1.0)
+    assert deadline.budget(0.5) == pytest.approx(1.0)
+    clock.now += 5
+    assert deadline.remaining() == 0.0
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            breaker.call(boom)
+    assert breaker.snapshot() == {"state": "open", "failures": 2}
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+
+def test_breaker_half_open_allows_one_trial(clock):
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ValueError):
+        breaker.call(boom)
+
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_trial_decides_state(clock):
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ValueError):
+        breaker.call(boom)
+
+    clock.now += 30
+    with pytest.raises(ValueError):
+        breaker.call(boom)
+    assert breaker.state == "open"
+
+    clock.now += 30
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.snapshot() == {"state": "closed", "failures": 0}
+
+
+def test_call_with_timeout(pool):
+    assert call_with_timeout(pool, lambda x: x * 2, 1.0, 21) == 42
+    with pytest.raises(StageTimeout):
+        call_with_timeout(pool, time.sleep, 0.05, 1)
+    with pytest.raises(StageTimeout):
+        call_with_timeout(pool, lambda: "never", 0)
+
+
+def test_hedged_call_first_attempt_wins(pool):
+    calls = []
+
+    def fn(remaining):
+        calls.append(remaining)
+        return "vec"
+
+    assert hedged_call(pool, fn, timeout=1.0, hedge_delay=0.5) == "vec"
+    assert len(calls) == 1
+
+
+def test_hedged_call_hedge_wins_over_slow_attempt(pool):
+    release = threading.Event()
+    calls = []
+
+    def fn(remaining):
+        calls.append(remaining)
+        if len(calls) == 1:
+            release.wait(2)
+            return "slow"
+        return "fast"
+
+    try:
+        assert hedged_call(pool, fn, timeout=2.0, hedge_delay=0.05) == "fast"
+    finally:
+        release.set()
+    assert len(calls) == 2
+
+
+def test_hedged_call_retries_after_failure(pool):
+    calls = []
+
+    def fn(remaining):
+        calls.append(remaining)
+        if len(calls) == 1:
+            raise ConnectionError("reset")
+        return "vec"
+
+    assert hedged_call(pool, fn, timeout=1.0, hedge_delay=0.5) == "vec"
+    assert len(calls) == 2
+
+
+def test_hedged_call_does_not_retry_non_retryable_error(pool):
+    calls = []
+
+    def fn(remaining):
+        calls.append(remaining)
+        raise PermissionError("401")
+
+    def retryable(error):
+        return isinstance(error, ConnectionError)
+
+    with pytest.raises(PermissionError):
+        hedged_call(pool, fn, timeout=1.0, hedge_delay=0.5, retryable=retryable)
+    assert len(calls) == 1
+
+
+def test_hedged_call_raises_last_error_when_all_fail(pool):
+    def fn(remaining):
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        hedged_call(pool, fn, timeout=1.0, hedge_delay=0.5)
+
+
+def test_hedged_call_timeout_cancels_queued_hedges():
+    # one worker: the hedge queues behind the stuck first attempt
+    executor = bulkhead("single", 1)
+    release = threading.Event()
+    calls = []
+
+    def fn(remaining):
+        calls.append(remaining)
+        release.wait(2)
+        return "vec"
+
+    try:
+        with pytest.raises(StageTimeout):
+            hedged_call(executor, fn, timeout=0.2, hedge_delay=0.05)
+    finally:
+        release.set()
+    executor.shutdown(wait=True)
+    assert len(calls) == 1
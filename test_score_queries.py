@@ -0,0 +1,101 @@
+import pytest
+
+from score_queries import ResultWriter, completed_queries, repair_output
+
+
+def result(*urls):
+    return {
+        "recommended_assessments": [{"url": url} for url in urls],
+        "degradation_level": "none",
+    }
+
+
+@pytest.fixture
+def csv_output(tmp_path):
+    path = str(tmp_path / "submission.csv")
+    writer = ResultWriter(path)
+    writer.write("Q1 sales\nmanager", result("a1", "a2"))
+    writer.write("Q2 java, dev", result("b1", "b2", "b3"))
+    writer.close()
+    return path
+
+
+def cut(path, marker):
+    # simulate a run killed right after `marker` was written
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text[: text.rindex(marker) + len(marker)])
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def test_repair_drops_group_cut_inside_query_field(csv_output):
+    cut(csv_output, '"Q2 j')
+    repair_output(csv_output)
+    assert completed_queries(csv_output) == {"Q1 sales\nmanager"}
+    assert read(csv_output).count("b") == 0
+
+
+def test_repair_drops_last_group_even_if_rows_look_complete(csv_output):
+    cut(csv_output, "b2\r\n")
+    repair_output(csv_output)
+    assert completed_queries(csv_output) == {"Q1 sales\nmanager"}
+
+
+def test_repair_keeps_quoted_newlines(csv_output):
+    # cut inside the quoted multi-line query of the first group
+    cut(csv_output, '"Q1 sales\n')
+    repair_output(csv_output)
+    assert read(csv_output) == "Query,Assessment_url\r\n"
+    assert completed_queries(csv_output) == set()
+
+
+def test_repair_cut_inside_header(tmp_path):
+    path = str(tmp_path / "submission.csv")
+    with open(path, "w") as f:
+        f.write("Query,Assess")
+    repair_output(path)
+    writer = ResultWriter(path)
+    writer.write("Q1", result("a1"))
+    writer.close()
+    assert read(path) == "Query,Assessment_url\r\nQ1,a1\r\n"
+
+
+def test_resumed_writes_follow_repaired_file(csv_output):
+    cut(csv_output, ",b")
+    repair_output(csv_output)
+    writer = ResultWriter(csv_output)
+    writer.write("Q2 java, dev", result("b1", "b2", "b3"))
+    writer.close()
+    assert completed_queries(csv_output) == {"Q1 sales\nmanager", "Q2 java, dev"}
+    assert read(csv_output).count("Q2 java, dev") == 3
+
+
+def test_repair_truncates_partial_jsonl_line(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    writer = ResultWriter(path)
+    writer.write("Q1", result("a1"))
+    writer.close()
+    with open(path, "a") as f:
+        f.write('{"query": "Q2", "recommen')
+
+    repair_output(path)
+    assert completed_queries(path) == {"Q1"}
+    writer = ResultWriter(path)
+    writer.write("Q2", result("b1"))
+    writer.close()
+    assert completed_queries(path) == {"Q1", "Q2"}
+
+
+def test_repair_leaves_complete_jsonl_alone(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    writer = ResultWriter(path)
+    writer.write("Q1", result("a1"))
+    writer.close()
+    before = read(path)
+    repair_output(path)
+    assert read(path) == before